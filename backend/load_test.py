@@ -0,0 +1,725 @@
+"""
+Load and soak test harness for the OCR API
+Starts the backend locally and measures latency, errors, throughput and
+process memory/file-descriptor growth under concurrent load
+
+Usage:
+    python load_test.py closed --concurrency 1,2,4,8,16 --step-duration 60
+    python load_test.py open --rates 0.25,0.5,1,2 --step-duration 60
+    python load_test.py soak --concurrency 4 --duration 7200
+    python load_test.py closed --url http://localhost:8000   # existing backend
+"""
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import cv2
+import numpy as np
+import requests
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# Configuration
+BACKEND_DIR = Path(__file__).resolve().parent
+STARTUP_TIMEOUT = 600  # Model loading can take minutes on a cold cache
+REQUEST_TIMEOUT = 300
+
+# Relative weight of each synthetic document type in the request mix
+DOCUMENT_MIX = {
+    "receipt": 0.4,
+    "letter": 0.3,
+    "table": 0.2,
+    "large_scan": 0.1,
+}
+
+# A step is saturated once p95 latency grows this much over the first step
+# while throughput gains less than SATURATION_THROUGHPUT_GAIN
+SATURATION_LATENCY_FACTOR = 2.0
+SATURATION_THROUGHPUT_GAIN = 0.10
+SATURATION_ERROR_RATE = 0.01
+
+# An open-loop step is falling behind when requests sent in the second half
+# of the send window wait this much longer (median) than those sent in the
+# first half, and the mean backlog grows by more than SATURATION_BACKLOG_GROWTH
+# of the requests sent and BACKLOG_NOISE_SIGMAS of arrival noise. A slow but
+# unlimited backend builds a backlog too, but its latency doesn't trend up.
+SATURATION_OPEN_LATENCY_GROWTH = 1.5
+SATURATION_BACKLOG_GROWTH = 0.10
+BACKLOG_NOISE_SIGMAS = 3
+
+# Memory trends over shorter runs are dominated by warm-up noise
+MIN_LEAK_TREND_SPAN = 600
+
+SAMPLE_LINES = [
+    "INVOICE #2025-0142",
+    "John Smith, ACME Corporation",
+    "Email: john.smith@example.com",
+    "Phone: (555) 123-4567",
+    "Date: December 16, 2025",
+    "Total amount due: $1,250.00",
+    "Visit https://www.example.com for details",
+    "Shipped to 42 Market Street, New York",
+    "Thank you for your business",
+]
+
+
+# ---------------------------------------------------------------------------
+# Synthetic documents
+# ---------------------------------------------------------------------------
+
+def _render_lines(width: int, height: int, lines: List[str], scale: float, rng: random.Random) -> np.ndarray:
+    """Draw text lines on a white page with a little scan noise"""
+    page = np.full((height, width, 3), 255, dtype=np.uint8)
+    line_height = int(40 * scale)
+    y = line_height * 2
+    while y < height - line_height:
+        text = rng.choice(lines)
+        cv2.putText(page, text, (int(40 * scale), y), cv2.FONT_HERSHEY_SIMPLEX,
+                    scale, (20, 20, 20), max(1, int(2 * scale)), cv2.LINE_AA)
+        y += line_height
+
+    noise = np.random.default_rng(rng.randint(0, 2 ** 32 - 1)).normal(0, 6, page.shape)
+    return np.clip(page.astype(np.float32) + noise, 0, 255).astype(np.uint8)
+
+
+def _render_table(width: int, height: int, rng: random.Random) -> np.ndarray:
+    """Draw a ruled table with numeric cells"""
+    page = np.full((height, width, 3), 255, dtype=np.uint8)
+    rows, cols = 12, 4
+    cell_w, cell_h = (width - 80) // cols, (height - 200) // rows
+    cv2.putText(page, "QUARTERLY REPORT - ACME Corporation", (40, 80),
+                cv2.FONT_HERSHEY_SIMPLEX, 1.2, (0, 0, 0), 2, cv2.LINE_AA)
+    for r in range(rows + 1):
+        y = 140 + r * cell_h
+        cv2.line(page, (40, y), (40 + cols * cell_w, y), (0, 0, 0), 2)
+    for c in range(cols + 1):
+        x = 40 + c * cell_w
+        cv2.line(page, (x, 140), (x, 140 + rows * cell_h), (0, 0, 0), 2)
+    for r in range(rows):
+        for c in range(cols):
+            text = f"${rng.randint(10, 9999):,}.{rng.randint(0, 99):02d}"
+            cv2.putText(page, text, (50 + c * cell_w, 140 + r * cell_h + cell_h // 2 + 10),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 0), 2, cv2.LINE_AA)
+    return page
+
+
+def generate_documents(seed: int = 0) -> Dict[str, tuple]:
+    """Build the synthetic document set as {kind: (filename, bytes, mime)}"""
+    rng = random.Random(seed)
+    pages = {
+        "receipt": (_render_lines(600, 900, SAMPLE_LINES, 0.6, rng), ".jpg"),
+        "letter": (_render_lines(1240, 1754, SAMPLE_LINES, 1.0, rng), ".jpg"),
+        "table": (_render_table(1240, 1000, rng), ".png"),
+        "large_scan": (_render_lines(2480, 3508, SAMPLE_LINES, 2.0, rng), ".jpg"),
+    }
+
+    documents = {}
+    for kind, (page, ext) in pages.items():
+        ok, encoded = cv2.imencode(ext, page)
+        if not ok:
+            raise RuntimeError(f"Could not encode synthetic {kind} document")
+        mime = "image/jpeg" if ext == ".jpg" else "image/png"
+        documents[kind] = (f"{kind}{ext}", encoded.tobytes(), mime)
+    return documents
+
+
+# ---------------------------------------------------------------------------
+# Backend process and resource monitoring
+# ---------------------------------------------------------------------------
+
+def start_backend(port: int, log_path: Path) -> subprocess.Popen:
+    """Start the FastAPI app with uvicorn and wait until /health responds"""
+    print(f"Starting backend on port {port} (log: {log_path})...")
+    with open(log_path, "w") as log_file:
+        proc = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port)],
+            cwd=BACKEND_DIR,
+            stdout=log_file,
+            stderr=subprocess.STDOUT,
+        )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"Backend exited during startup with code {proc.returncode}, see {log_path}")
+        try:
+            if requests.get(f"{url}/health", timeout=2).status_code == 200:
+                print("Backend is ready")
+                return proc
+        except requests.exceptions.RequestException:
+            pass
+        time.sleep(1)
+
+    stop_backend(proc)
+    raise RuntimeError(f"Backend did not become ready within {STARTUP_TIMEOUT}s, see {log_path}")
+
+
+def stop_backend(proc: subprocess.Popen):
+    """Terminate the backend process"""
+    proc.terminate()
+    try:
+        proc.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
+
+
+def read_process_stats(pid: int) -> Optional[Dict]:
+    """Return RSS in MB and open file descriptor count for a process"""
+    if psutil is not None:
+        try:
+            proc = psutil.Process(pid)
+            fds = proc.num_fds() if hasattr(proc, "num_fds") else proc.num_handles()
+            return {"rss_mb": proc.memory_info().rss / 2 ** 20, "fds": fds}
+        except psutil.Error:
+            return None
+
+    # Linux fallback without psutil
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            rss_kb = next(int(line.split()[1]) for line in f if line.startswith("VmRSS:"))
+        return {"rss_mb": rss_kb / 1024, "fds": len(os.listdir(f"/proc/{pid}/fd"))}
+    except (OSError, StopIteration):
+        return None
+
+
+class ResourceMonitor(threading.Thread):
+    """Samples backend RSS and FD count at a fixed interval"""
+
+    def __init__(self, pid: int, interval: float):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.interval = interval
+        self.samples = []
+        self._stop_event = threading.Event()
+        self._start = time.monotonic()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            self.sample()
+            self._stop_event.wait(self.interval)
+
+    def sample(self) -> Optional[Dict]:
+        stats = read_process_stats(self.pid)
+        if stats is not None:
+            stats["t"] = time.monotonic() - self._start
+            self.samples.append(stats)
+        return stats
+
+    def stats_at(self, when: float) -> Dict:
+        """RSS and FD count from the last sample taken at or before `when` (time.monotonic)"""
+        earlier = [s for s in self.samples if self._start + s["t"] <= when]
+        if not earlier:
+            return {"rss_end_mb": None, "fds_end": None}
+        return {"rss_end_mb": earlier[-1]["rss_mb"], "fds_end": earlier[-1]["fds"]}
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+        self.sample()
+
+
+# ---------------------------------------------------------------------------
+# Load generation
+# ---------------------------------------------------------------------------
+
+_local = threading.local()
+
+
+def _session() -> requests.Session:
+    """One pooled session per worker thread"""
+    if not hasattr(_local, "session"):
+        _local.session = requests.Session()
+    return _local.session
+
+
+def send_request(url: str, document: tuple, scheduled: Optional[float] = None) -> Dict:
+    """POST one document; latency is measured from `scheduled` when given"""
+    filename, data, mime = document
+    start = time.monotonic()
+    try:
+        response = _session().post(
+            f"{url}/api/process-document",
+            files={"file": (filename, data, mime)},
+            timeout=REQUEST_TIMEOUT,
+        )
+        ok = response.status_code == 200
+        status = response.status_code
+    except requests.exceptions.RequestException as e:
+        ok = False
+        status = type(e).__name__
+    end = time.monotonic()
+    return {
+        "scheduled": scheduled if scheduled is not None else start,
+        "start": start,
+        "end": end,
+        "latency": end - (scheduled if scheduled is not None else start),
+        "ok": ok,
+        "status": status,
+    }
+
+
+def pick_document(documents: Dict[str, tuple], rng: random.Random) -> tuple:
+    """Choose a document according to DOCUMENT_MIX"""
+    kinds = list(DOCUMENT_MIX)
+    kind = rng.choices(kinds, weights=[DOCUMENT_MIX[k] for k in kinds])[0]
+    return documents[kind]
+
+
+def run_closed_loop(url: str, documents: Dict[str, tuple], concurrency: int,
+                    duration: float, seed: int = 0, stop: Optional[threading.Event] = None,
+                    results: Optional[List[Dict]] = None) -> List[Dict]:
+    """
+    Each of `concurrency` workers sends its next request as soon as the last
+    one returns. Results are appended to `results` as they complete, so a
+    caller running this in a thread can summarise them while it runs.
+    """
+    results = [] if results is None else results
+    stop = stop or threading.Event()
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def worker(worker_id: int):
+        rng = random.Random(seed + worker_id)
+        while time.monotonic() < deadline and not stop.is_set():
+            result = send_request(url, pick_document(documents, rng))
+            with lock:
+                results.append(result)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def poisson_schedule(rate: float, duration: float, rng: random.Random) -> List[float]:
+    """Send offsets (seconds from the step start) of Poisson arrivals at `rate` per second"""
+    offsets = []
+    offset = 0.0
+    while offset < duration:
+        offsets.append(offset)
+        offset += rng.expovariate(rate)
+    return offsets
+
+
+def run_open_loop(url: str, documents: Dict[str, tuple], rate: float,
+                  duration: float, max_in_flight: int, seed: int = 0) -> tuple:
+    """
+    Send requests on a Poisson schedule at `rate` per second regardless of
+    how fast the backend answers. Latency includes time spent queued behind
+    the in-flight limit, so overload shows up instead of being hidden.
+    Returns the results and the monotonic time the schedule started at.
+    """
+    rng = random.Random(seed)
+    futures = []
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=max_in_flight) as executor:
+        try:
+            for offset in poisson_schedule(rate, duration, rng):
+                delay = start + offset - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                futures.append(executor.submit(send_request, url, pick_document(documents, rng), start + offset))
+        except BaseException:
+            # Don't work through the queued backlog when interrupted
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+    return [future.result() for future in futures], start
+
+
+# ---------------------------------------------------------------------------
+# Analysis and reporting
+# ---------------------------------------------------------------------------
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, int(np.ceil(pct / 100 * len(ordered))) - 1)
+    return ordered[index]
+
+
+def summarize(results: List[Dict], duration: float) -> Dict:
+    """Latency percentiles, error rate and throughput for one step"""
+    latencies = [r["latency"] for r in results if r["ok"]]
+    errors = [r for r in results if not r["ok"]]
+    error_breakdown = {}
+    for r in errors:
+        error_breakdown[str(r["status"])] = error_breakdown.get(str(r["status"]), 0) + 1
+
+    return {
+        "requests": len(results),
+        "errors": len(errors),
+        "error_rate": len(errors) / len(results) if results else 0.0,
+        "error_breakdown": error_breakdown,
+        "throughput_rps": len(latencies) / duration if duration > 0 else 0.0,
+        "latency_mean": float(np.mean(latencies)) if latencies else 0.0,
+        "latency_p50": percentile(latencies, 50),
+        "latency_p90": percentile(latencies, 90),
+        "latency_p95": percentile(latencies, 95),
+        "latency_p99": percentile(latencies, 99),
+        "latency_max": max(latencies) if latencies else 0.0,
+    }
+
+
+def results_in_window(results: List[Dict], origin: float, start: float, end: float) -> List[Dict]:
+    """Results that completed between `start` and `end` seconds after `origin`"""
+    return [r for r in results if start <= r["end"] - origin < end]
+
+
+def open_loop_stats(results: List[Dict], origin: float, send_window: float) -> Dict:
+    """
+    Rates measured over the send window only, so draining in-flight
+    requests afterwards doesn't dilute them, plus the median latency of
+    requests sent and the mean backlog (sent but not yet answered) over
+    each half of the window
+    """
+    def mean_backlog(a: float, b: float) -> float:
+        # Time each request spent in flight inside [a, b], averaged over it
+        in_flight = sum(
+            max(0.0, min(r["end"] - origin, b) - max(r["scheduled"] - origin, a))
+            for r in results
+        )
+        return in_flight / (b - a)
+
+    half = send_window / 2
+    completed = [r for r in results if r["ok"] and r["end"] - origin <= send_window]
+    return {
+        "sent": len(results),
+        "sent_rps": len(results) / send_window,
+        "throughput_rps": len(completed) / send_window,
+        "latency_first_half": percentile([r["latency"] for r in results if r["scheduled"] - origin < half], 50),
+        "latency_second_half": percentile([r["latency"] for r in results if r["scheduled"] - origin >= half], 50),
+        "backlog_first_half": mean_backlog(0.0, half),
+        "backlog_second_half": mean_backlog(half, send_window),
+    }
+
+
+def mark_saturation(steps: List[Dict]) -> Optional[int]:
+    """
+    Flag each step that is past the saturation point and return the index
+    of the first one, or None if the backend kept up at every load level
+    """
+    baseline_p95 = next((s["latency_p95"] for s in steps if s["latency_p95"] > 0), 0.0)
+    best_throughput = 0.0
+    first = None
+
+    for i, step in enumerate(steps):
+        reasons = []
+        if step["error_rate"] > SATURATION_ERROR_RATE:
+            reasons.append(f"error rate {step['error_rate']:.1%}")
+        if i > 0 and baseline_p95 > 0:
+            latency_factor = step["latency_p95"] / baseline_p95
+            throughput_gain = (step["throughput_rps"] - best_throughput) / best_throughput if best_throughput else 0.0
+            if latency_factor >= SATURATION_LATENCY_FACTOR and throughput_gain < SATURATION_THROUGHPUT_GAIN:
+                reasons.append(f"p95 {latency_factor:.1f}x baseline with {throughput_gain:+.0%} throughput")
+        if "backlog_second_half" in step:
+            # In a stable open loop the backlog hovers around rate x latency;
+            # past capacity it and the latency keep growing as requests arrive
+            first_half, second_half = step["backlog_first_half"], step["backlog_second_half"]
+            noise = BACKLOG_NOISE_SIGMAS * max(first_half, 1) ** 0.5
+            backlog_growing = second_half - first_half > max(SATURATION_BACKLOG_GROWTH * step["sent"], noise)
+            latency_growing = (step["latency_second_half"]
+                               > SATURATION_OPEN_LATENCY_GROWTH * step["latency_first_half"])
+            if backlog_growing and latency_growing:
+                reasons.append(f"backlog grew from {first_half:.1f} to {second_half:.1f} "
+                               f"of {step['sent']} sent, median latency "
+                               f"{step['latency_first_half']:.1f}s -> {step['latency_second_half']:.1f}s")
+
+        step["saturated"] = bool(reasons)
+        step["saturation_reasons"] = reasons
+        if reasons and first is None:
+            first = i
+        best_throughput = max(best_throughput, step["throughput_rps"])
+
+    return first
+
+
+def memory_trend(samples: List[Dict], warmup_fraction: float, leak_threshold_mb_per_hour: float,
+                 judge: bool = True) -> Dict:
+    """
+    Fit a line through RSS and FD samples after warm-up. A positive RSS
+    slope above the threshold, or any sustained FD growth, is reported as
+    a suspected leak. With `judge=False` (stepped-load runs, where RSS
+    rises with load) or on runs shorter than MIN_LEAK_TREND_SPAN, the
+    trend is reported without a verdict.
+    """
+    if len(samples) < 3:
+        return {"samples": len(samples), "suspected_leak": False, "note": "not enough samples"}
+
+    steady = samples[int(len(samples) * warmup_fraction):]
+    if len(steady) < 3:
+        steady = samples
+    t_hours = np.array([s["t"] for s in steady]) / 3600
+    rss = np.array([s["rss_mb"] for s in steady])
+    fds = np.array([s["fds"] for s in steady])
+
+    if np.ptp(t_hours) == 0:
+        return {"samples": len(samples), "suspected_leak": False, "note": "samples span no time"}
+
+    rss_slope = float(np.polyfit(t_hours, rss, 1)[0])
+    fd_slope = float(np.polyfit(t_hours, fds, 1)[0])
+    span = samples[-1]["t"] - samples[0]["t"]
+    reasons = []
+    not_judged_reason = None
+    if not judge:
+        not_judged_reason = "stepped-load run, RSS rises with load; use soak mode to judge leaks"
+    elif span < MIN_LEAK_TREND_SPAN:
+        not_judged_reason = f"run shorter than {MIN_LEAK_TREND_SPAN}s"
+    else:
+        if rss_slope > leak_threshold_mb_per_hour:
+            reasons.append(f"RSS growing {rss_slope:.1f} MB/h")
+        if fd_slope > 1 and fds[-1] > fds[0]:
+            reasons.append(f"FDs growing {fd_slope:.1f}/h")
+
+    return {
+        "span_seconds": span,
+        "samples": len(samples),
+        "rss_start_mb": samples[0]["rss_mb"],
+        "rss_end_mb": samples[-1]["rss_mb"],
+        "rss_peak_mb": max(s["rss_mb"] for s in samples),
+        "rss_slope_mb_per_hour": rss_slope,
+        "fds_start": samples[0]["fds"],
+        "fds_end": samples[-1]["fds"],
+        "fd_slope_per_hour": fd_slope,
+        "judged": not_judged_reason is None,
+        "not_judged_reason": not_judged_reason,
+        "suspected_leak": bool(reasons),
+        "leak_reasons": reasons,
+    }
+
+
+def print_report(report: Dict):
+    """Print a human-readable summary of the run"""
+    print("\n" + "=" * 78)
+    print(f"Load Test Report ({report['mode']})")
+    print("=" * 78)
+    if report.get("aborted"):
+        print(f"⚠️  Run aborted early ({report['aborted']}), partial results below")
+
+    if report["steps"]:
+        header = f"{'load':>10} {'reqs':>6} {'err%':>6} {'rps':>7} {'p50':>7} {'p95':>7} {'p99':>7} {'rss MB':>8}"
+        print(header)
+        print("-" * len(header))
+        for step in report["steps"]:
+            marker = "  <-- saturated" if step.get("saturated") else ""
+            rss = step.get("rss_end_mb")
+            print(f"{step['load']:>10} {step['requests']:>6} {step['error_rate']:>6.1%} "
+                  f"{step['throughput_rps']:>7.2f} {step['latency_p50']:>7.2f} "
+                  f"{step['latency_p95']:>7.2f} {step['latency_p99']:>7.2f} "
+                  f"{rss if rss is not None else float('nan'):>8.1f}{marker}")
+            for reason in step.get("saturation_reasons", []):
+                print(f"{'':>12}{reason}")
+
+        saturation = report.get("saturation_step")
+        if saturation is None:
+            print("\n✅ No saturation point reached")
+        else:
+            print(f"\n⚠️  Saturation at {report['steps'][saturation]['load']}")
+
+    memory = report.get("memory")
+    if memory:
+        print("\nMemory / FD trend:")
+        if "note" in memory:
+            print(f"  {memory['note']}")
+        else:
+            print(f"  RSS {memory['rss_start_mb']:.1f} -> {memory['rss_end_mb']:.1f} MB "
+                  f"(peak {memory['rss_peak_mb']:.1f}, slope {memory['rss_slope_mb_per_hour']:+.1f} MB/h)")
+            print(f"  FDs {memory['fds_start']} -> {memory['fds_end']} "
+                  f"(slope {memory['fd_slope_per_hour']:+.1f}/h)")
+            if not memory["judged"]:
+                print(f"  Not judged for leaks: {memory['not_judged_reason']}")
+            elif memory["suspected_leak"]:
+                print(f"  ⚠️  Suspected leak: {'; '.join(memory['leak_reasons'])}")
+            else:
+                print("  ✅ No leak trend detected")
+    print("=" * 78)
+
+
+# ---------------------------------------------------------------------------
+# Entry point
+# ---------------------------------------------------------------------------
+
+def _parse_list(value: str, cast):
+    return [cast(v) for v in value.split(",") if v.strip()]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Load and soak test the OCR API")
+    parser.add_argument("mode", choices=["closed", "open", "soak"],
+                        help="closed: fixed concurrency steps, open: fixed arrival rate steps, soak: long fixed load")
+    parser.add_argument("--url", help="Test an already running backend instead of starting one")
+    parser.add_argument("--pid", type=int, help="Backend process to monitor when using --url")
+    parser.add_argument("--port", type=int, default=8765, help="Port for the locally started backend")
+    parser.add_argument("--concurrency", default="1,2,4,8",
+                        help="Comma-separated worker counts (closed) or a single count (soak)")
+    parser.add_argument("--rates", default="0.25,0.5,1,2", help="Comma-separated request rates per second (open)")
+    parser.add_argument("--max-in-flight", type=int, default=64, help="Open-loop client connection limit")
+    parser.add_argument("--step-duration", type=float, default=60, help="Seconds per load step")
+    parser.add_argument("--duration", type=float, default=3600, help="Soak duration in seconds")
+    parser.add_argument("--window", type=float, default=300, help="Soak report window in seconds")
+    parser.add_argument("--sample-interval", type=float, default=5, help="Seconds between RSS/FD samples")
+    parser.add_argument("--warmup", type=int, default=2, help="Requests sent before measuring")
+    parser.add_argument("--leak-threshold", type=float, default=10.0, help="RSS slope (MB/h) flagged as a leak")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="load_test_report.json",
+                        help="Where to write the JSON report (rewritten after every step)")
+    parser.add_argument("--backend-log", help="Backend output log (default: load_test_backend.log next to the report)")
+    return parser.parse_args(argv)
+
+
+def write_report(report: Dict, path: str):
+    """Mark saturation and write the report so far to disk"""
+    report["saturation_step"] = mark_saturation(report["steps"])
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+
+
+def check_warmup(url: str, documents: Dict[str, tuple], count: int):
+    """Send warm-up requests and fail fast if the backend can't process documents"""
+    for kind, document in documents.items():
+        for _ in range(count):
+            result = send_request(url, document)
+            if not result["ok"]:
+                raise RuntimeError(
+                    f"Warm-up request with the {kind} document failed ({result['status']}). "
+                    f"Check the backend URL and log before load testing."
+                )
+
+
+def run_soak(url: str, documents: Dict[str, tuple], args, stop: threading.Event,
+             monitor: Optional[ResourceMonitor], report: Dict):
+    """Run constant closed-loop load, summarising and saving each window as it completes"""
+    concurrency = _parse_list(args.concurrency, int)[0]
+    print(f"Running soak at {concurrency} workers for {args.duration:.0f}s "
+          f"in {args.window:.0f}s windows...")
+
+    results = []
+    runner = threading.Thread(
+        target=run_closed_loop,
+        args=(url, documents, concurrency, args.duration, args.seed, stop, results),
+    )
+    step_start = time.monotonic()
+    runner.start()
+
+    offset = 0.0
+    done = False
+    while not done:
+        # The last window waits for in-flight requests to drain and takes
+        # their results, rather than leaving a few-second window of its own
+        last = offset + args.window >= args.duration
+        timeout = None if last else max(0.0, step_start + offset + args.window - time.monotonic())
+        runner.join(timeout=timeout)
+        done = not runner.is_alive()
+        window_end = time.monotonic() - step_start if done else offset + args.window
+
+        window_results = results_in_window(list(results), step_start, offset, window_end)
+        offset_label = f"t+{offset / 60:.0f}m" if args.window >= 60 else f"t+{offset:.0f}s"
+        step = {"load": offset_label, **summarize(window_results, window_end - offset)}
+        if monitor is not None:
+            step.update(monitor.stats_at(step_start + window_end))
+        report["steps"].append(step)
+        write_report(report, args.output)
+        print(f"  {offset_label}: {step['requests']} requests, p95 {step['latency_p95']:.2f}s, "
+              f"errors {step['error_rate']:.1%}")
+        offset += args.window
+
+
+def run_steps(url: str, documents: Dict[str, tuple], args, stop: threading.Event,
+              monitor: Optional[ResourceMonitor], report: Dict):
+    """Run one closed- or open-loop step per load level, saving after each"""
+    if args.mode == "closed":
+        loads = _parse_list(args.concurrency, int)
+    else:
+        loads = _parse_list(args.rates, float)
+
+    for index, load in enumerate(loads):
+        label = f"{load} rps" if args.mode == "open" else f"{load} workers"
+        print(f"Running {args.mode} loop at {label} for {args.step_duration:.0f}s...")
+
+        step_start = time.monotonic()
+        if args.mode == "open":
+            results, send_start = run_open_loop(url, documents, load, args.step_duration,
+                                                args.max_in_flight, args.seed + index)
+        else:
+            results = run_closed_loop(url, documents, load, args.step_duration, args.seed, stop)
+        elapsed = time.monotonic() - step_start
+
+        step = {"load": label, **summarize(results, elapsed)}
+        if args.mode == "open":
+            step["offered_rps"] = load
+            step.update(open_loop_stats(results, send_start, args.step_duration))
+        if monitor is not None:
+            monitor.sample()
+            step.update(monitor.stats_at(time.monotonic()))
+        report["steps"].append(step)
+        write_report(report, args.output)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    documents = generate_documents(args.seed)
+    print("Synthetic documents: " + ", ".join(
+        f"{kind} ({len(data) / 1024:.0f} KB)" for kind, (_, data, _) in documents.items()))
+
+    proc = None
+    if args.url:
+        url = args.url.rstrip("/")
+        pid = args.pid
+    else:
+        log_path = Path(args.backend_log or Path(args.output).resolve().parent / "load_test_backend.log")
+        proc = start_backend(args.port, log_path)
+        url = f"http://127.0.0.1:{args.port}"
+        pid = proc.pid
+
+    monitor = None
+    if pid is not None:
+        monitor = ResourceMonitor(pid, args.sample_interval)
+        monitor.start()
+    else:
+        print("⚠️  Not monitoring memory: pass --pid to watch an existing backend")
+
+    report = {"mode": args.mode, "url": url, "document_mix": DOCUMENT_MIX, "steps": []}
+    stop = threading.Event()
+    try:
+        check_warmup(url, documents, args.warmup)
+        if args.mode == "soak":
+            run_soak(url, documents, args, stop, monitor, report)
+        else:
+            run_steps(url, documents, args, stop, monitor, report)
+    except BaseException as e:
+        report["aborted"] = str(e) or type(e).__name__
+        raise
+    finally:
+        # Keep everything collected so far, even if the run was interrupted
+        stop.set()
+        if monitor is not None:
+            monitor.stop()
+            report["resource_samples"] = monitor.samples
+            report["memory"] = memory_trend(monitor.samples, 0.1, args.leak_threshold,
+                                            judge=args.mode == "soak")
+        if proc is not None:
+            stop_backend(proc)
+
+        print_report(report)
+        write_report(report, args.output)
+        print(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""
+Unit tests for the load test harness analysis helpers
+These need no running backend: python -m pytest test_load_test.py
+"""
+
+import random
+
+import pytest
+
+from load_test import (
+    MIN_LEAK_TREND_SPAN,
+    mark_saturation,
+    memory_trend,
+    open_loop_stats,
+    percentile,
+    poisson_schedule,
+    results_in_window,
+    summarize,
+)
+
+
+def _step(p95, rps, error_rate=0.0, **extra):
+    return {"latency_p95": p95, "throughput_rps": rps, "error_rate": error_rate, **extra}
+
+
+def _open(sent, backlog, latency):
+    return _step(latency[1], sent / 60, sent=sent,
+                 backlog_first_half=backlog[0], backlog_second_half=backlog[1],
+                 latency_first_half=latency[0], latency_second_half=latency[1])
+
+
+def _open_step(rate, duration, seed, service_time, servers=None):
+    """
+    Simulate one open-loop step against a backend with a fixed service time,
+    either unlimited (servers=None) or a FIFO queue with `servers` workers
+    """
+    schedule = poisson_schedule(rate, duration, random.Random(seed))
+    free_at = [0.0] * (servers or 0)
+    results = []
+    for t in schedule:
+        if servers is None:
+            end = t + service_time
+        else:
+            worker = min(range(servers), key=free_at.__getitem__)
+            end = max(t, free_at[worker]) + service_time
+            free_at[worker] = end
+        results.append({"scheduled": t, "start": t, "end": end, "latency": end - t, "ok": True, "status": 200})
+    return {"load": f"{rate} rps", "offered_rps": rate,
+            **summarize(results, duration), **open_loop_stats(results, 0.0, duration)}
+
+
+def _samples(duration, rss_per_hour, fds_per_hour=0.0, count=50, rss_start=500.0, fds_start=20):
+    step = duration / (count - 1)
+    return [
+        {
+            "t": i * step,
+            "rss_mb": rss_start + rss_per_hour * i * step / 3600,
+            "fds": int(fds_start + fds_per_hour * i * step / 3600),
+        }
+        for i in range(count)
+    ]
+
+
+@pytest.mark.parametrize("values, pct, expected", [
+    ([], 95, 0.0),
+    ([3.0], 50, 3.0),
+    ([1, 2, 3, 4], 50, 2),
+    ([1, 2, 3, 4], 100, 4),
+    (list(range(1, 101)), 95, 95),
+    ([5, 1, 4, 2, 3], 99, 5),
+])
+def test_percentile(values, pct, expected):
+    assert percentile(values, pct) == expected
+
+
+def test_summarize_counts_errors_and_throughput():
+    results = [
+        {"latency": 1.0, "ok": True, "status": 200},
+        {"latency": 2.0, "ok": True, "status": 200},
+        {"latency": 9.0, "ok": False, "status": 500},
+        {"latency": 0.1, "ok": False, "status": "ConnectionError"},
+    ]
+    summary = summarize(results, duration=4.0)
+
+    assert summary["requests"] == 4
+    assert summary["errors"] == 2
+    assert summary["error_rate"] == 0.5
+    assert summary["error_breakdown"] == {"500": 1, "ConnectionError": 1}
+    # Only successful requests count towards throughput and latency
+    assert summary["throughput_rps"] == 0.5
+    assert summary["latency_max"] == 2.0
+
+
+def test_summarize_empty():
+    summary = summarize([], duration=0)
+    assert summary["requests"] == 0
+    assert summary["error_rate"] == 0.0
+    assert summary["throughput_rps"] == 0.0
+
+
+def test_results_in_window_uses_completion_time():
+    origin = 100.0
+    results = [{"end": origin + t} for t in (0.0, 0.5, 1.0, 1.75, 2.0, 5.0)]
+
+    assert [r["end"] - origin for r in results_in_window(results, origin, 0, 1)] == [0.0, 0.5]
+    assert [r["end"] - origin for r in results_in_window(results, origin, 1, 2)] == [1.0, 1.75]
+    assert results_in_window(results, origin, 3, 4) == []
+
+
+@pytest.mark.parametrize("steps, expected_first, expected_flags", [
+    # Throughput keeps scaling: never saturated
+    ([_step(1.0, 1.0), _step(1.1, 2.0), _step(1.2, 3.9)], None, [False, False, False]),
+    # p95 doubles while throughput stays flat
+    ([_step(1.0, 1.0), _step(1.2, 1.9), _step(2.5, 2.0)], 2, [False, False, True]),
+    # p95 doubles but throughput still grows more than 10%: not yet saturated
+    ([_step(1.0, 1.0), _step(2.5, 1.5)], None, [False, False]),
+    # Error rate alone marks saturation, even on the first step
+    ([_step(1.0, 1.0, error_rate=0.05), _step(1.0, 2.0)], 0, [True, False]),
+    # Open loop whose backlog keeps growing
+    ([_open(sent=60, backlog=(3.0, 3.5), latency=(1.0, 1.1)),
+      _open(sent=120, backlog=(15.0, 45.0), latency=(8.0, 25.0))], 1, [False, True]),
+    # Open loop with a large but steady backlog
+    ([_open(sent=120, backlog=(20.0, 24.0), latency=(10.0, 11.0))], None, [False]),
+    # Slow unlimited backend still ramping up: backlog grows, latency doesn't
+    ([_open(sent=120, backlog=(15.0, 40.0), latency=(20.0, 20.0))], None, [False]),
+    # Baseline comes from the first step with latency data
+    ([_step(0.0, 0.0), _step(1.0, 1.0), _step(3.0, 1.0)], 2, [False, False, True]),
+])
+def test_mark_saturation(steps, expected_first, expected_flags):
+    assert mark_saturation(steps) == expected_first
+    assert [step["saturated"] for step in steps] == expected_flags
+    for step in steps:
+        assert bool(step["saturation_reasons"]) == step["saturated"]
+
+
+def test_open_loop_stats_measure_the_send_window():
+    results = [
+        {"scheduled": 0.0, "end": 1.0, "latency": 1.0, "ok": True},
+        {"scheduled": 2.0, "end": 8.0, "latency": 6.0, "ok": True},
+        {"scheduled": 4.0, "end": 5.0, "latency": 1.0, "ok": False},
+        {"scheduled": 9.0, "end": 15.0, "latency": 6.0, "ok": True},  # Drains after the window
+    ]
+    stats = open_loop_stats(results, 0.0, 10.0)
+
+    assert stats["sent"] == 4
+    assert stats["sent_rps"] == 0.4
+    # Only successful requests answered inside the window count
+    assert stats["throughput_rps"] == 0.2
+    # In flight over [0, 5]: 1 s + 3 s + 1 s; over [5, 10]: 3 s + 1 s
+    assert stats["backlog_first_half"] == 1.0
+    assert stats["backlog_second_half"] == 0.8
+    assert stats["latency_first_half"] == 1.0
+    assert stats["latency_second_half"] == 6.0
+
+
+@pytest.mark.parametrize("rates, service_time, servers", [
+    # Unlimited backends, fast and slow; Poisson arrival counts often fall
+    # short of the nominal rate, which must not look like falling behind
+    ((0.25, 0.5, 1, 2), 3.0, None),
+    ((0.25, 0.5, 1, 2), 20.0, None),
+    ((5, 10, 20), 3.0, None),
+    # One worker taking 1 s per request, well below capacity
+    ((0.25, 0.5), 1.0, 1),
+])
+def test_open_loop_within_capacity_never_saturates(rates, service_time, servers):
+    for seed in range(300):
+        steps = [_open_step(rate, 60, seed + i, service_time, servers) for i, rate in enumerate(rates)]
+        assert mark_saturation(steps) is None, (seed, steps)
+
+
+def test_open_loop_flags_steps_past_capacity():
+    # One worker taking 1 s per request handles 1 rps; 2 rps overloads it
+    flagged = 0
+    for seed in range(300):
+        steps = [_open_step(rate, 60, seed + i, service_time=1.0, servers=1)
+                 for i, rate in enumerate((0.25, 0.5, 2.0))]
+        first = mark_saturation(steps)
+        assert first in (2, None), (seed, steps)
+        flagged += first == 2
+    assert flagged >= 295
+
+
+@pytest.mark.parametrize("samples, judge, judged, leak", [
+    # Flat RSS over a long soak
+    (_samples(7200, rss_per_hour=0.0), True, True, False),
+    # Slow growth under the threshold
+    (_samples(7200, rss_per_hour=5.0), True, True, False),
+    # RSS growth above the threshold
+    (_samples(7200, rss_per_hour=50.0), True, True, True),
+    # FD growth with flat RSS
+    (_samples(7200, rss_per_hour=0.0, fds_per_hour=20.0), True, True, True),
+    # Steep growth over a run too short to judge
+    (_samples(MIN_LEAK_TREND_SPAN / 2, rss_per_hour=500.0), True, False, False),
+    # Stepped-load runs are never judged
+    (_samples(7200, rss_per_hour=50.0), False, False, False),
+])
+def test_memory_trend(samples, judge, judged, leak):
+    trend = memory_trend(samples, 0.1, leak_threshold_mb_per_hour=10.0, judge=judge)
+    assert trend["judged"] == judged
+    assert trend["suspected_leak"] == leak
+    assert bool(trend["leak_reasons"]) == leak
+    assert (trend["not_judged_reason"] is None) == judged
+
+
+def test_memory_trend_ignores_warmup():
+    # A big jump during the first 10% of samples, then flat
+    samples = _samples(7200, rss_per_hour=0.0)
+    for sample in samples[:4]:
+        sample["rss_mb"] -= 300
+    assert not memory_trend(samples, 0.1, 10.0)["suspected_leak"]
+
+
+def test_memory_trend_not_enough_samples():
+    trend = memory_trend(_samples(7200, 0.0, count=2), 0.1, 10.0)
+    assert trend["suspected_leak"] is False
+    assert "note" in trend
@@ -1,8 +1,15 @@
 import streamlit as st
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from PIL import Image
+import hashlib
 import json
-import io
+
+from upload import oriented_size, prepare_upload
+
+# (connect, read) timeouts for the backend call
+REQUEST_TIMEOUT = (5, 120)
 
 # Page configuration
 st.set_page_config(
@@ -34,6 +41,38 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
+
+@st.cache_resource
+def get_http_session():
+    """Pooled HTTP session shared across reruns and users"""
+    session = requests.Session()
+    retries = Retry(total=2, connect=2, read=0, status=0, backoff_factor=0.5)
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=retries)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+@st.cache_data(show_spinner=False, max_entries=32, ttl=3600)
+def process_document(api_url: str, file_hash: str, filename: str, mime: str,
+                     _data: bytes, _uploads: list):
+    """
+    Downscale and send the image to the backend, cached by file hash so
+    repeat clicks skip both the image work and the round trip. The size of
+    each real upload is appended to `_uploads`, which stays empty on a
+    cache hit.
+    """
+    payload, filename, mime = prepare_upload(_data, filename, mime)
+    response = get_http_session().post(
+        f"{api_url}/api/process-document",
+        files={"file": (filename, payload, mime)},
+        timeout=REQUEST_TIMEOUT
+    )
+    response.raise_for_status()
+    _uploads.append(len(payload))
+    return response.json()
+
+
 # Sidebar
 with st.sidebar:
     st.title("⚙️ Settings")
@@ -87,32 +126,38 @@ if uploaded_file:
         
         # Process button
         if st.button("🚀 Process Document", type="primary"):
-            with st.spinner("Processing document... This may take a few seconds..."):
+            with st.status("Processing document... This may take a few seconds...") as status:
                 try:
-                    # Prepare file for upload
-                    uploaded_file.seek(0)
-                    files = {"file": (uploaded_file.name, uploaded_file, uploaded_file.type)}
-                    
-                    # Call API
-                    response = requests.post(
-                        f"{api_url}/api/process-document",
-                        files=files,
-                        timeout=60
-                    )
-                    
-                    if response.status_code == 200:
-                        result = response.json()
-                        
-                        st.success("✅ Processing Complete!")
-                        
-                        # Store result in session state
-                        st.session_state['result'] = result
+                    data = uploaded_file.getvalue()
+                    file_hash = hashlib.sha256(data).hexdigest()
+
+                    # Call API (cached by file hash)
+                    uploads = []
+                    result = process_document(api_url, file_hash, uploaded_file.name,
+                                              uploaded_file.type, data, uploads)
+
+                    if uploads:
+                        label = (f"✅ Processing Complete! Sent {uploads[0] / 1024:.0f} KB "
+                                 f"of {len(data) / 1024:.0f} KB")
                     else:
-                        st.error(f"❌ Error: {response.status_code} - {response.text}")
-                        
+                        label = "✅ Using cached result"
+                    status.update(label=label, state="complete")
+
+                    # Store result in session state
+                    st.session_state['result'] = result
+                    st.session_state['uploaded_size'] = oriented_size(image)
+
+                except requests.exceptions.HTTPError as e:
+                    status.update(label="Processing failed", state="error")
+                    st.error(f"❌ Error: {e.response.status_code} - {e.response.text}")
                 except requests.exceptions.ConnectionError:
+                    status.update(label="Processing failed", state="error")
                     st.error("❌ Cannot connect to backend API. Make sure the backend is running!")
+                except requests.exceptions.Timeout:
+                    status.update(label="Processing failed", state="error")
+                    st.error("❌ Backend timed out. Try a smaller image or check the backend logs.")
                 except Exception as e:
+                    status.update(label="Processing failed", state="error")
                     st.error(f"❌ Error: {str(e)}")
 
 # Display results if available
@@ -275,12 +320,17 @@ if 'result' in st.session_state:
         st.markdown("---")
         st.markdown("**Image Metadata:**")
         metadata = result["metadata"]["image_dimensions"]
-        st.json({
-            "Width": f"{metadata['width']} px",
-            "Height": f"{metadata['height']} px",
+        image_info = {
+            "Processed Width": f"{metadata['width']} px",
+            "Processed Height": f"{metadata['height']} px",
             "Channels": metadata['channels'],
             "Aspect Ratio": f"{metadata['width']/metadata['height']:.2f}"
-        })
+        }
+        # Large images are downscaled before upload, so the backend saw a smaller size
+        uploaded_size = st.session_state.get('uploaded_size')
+        if uploaded_size and tuple(uploaded_size) != (metadata['width'], metadata['height']):
+            image_info["Uploaded Size"] = f"{uploaded_size[0]} x {uploaded_size[1]} px"
+        st.json(image_info)
         
         # Download complete results
         st.download_button(
@@ -0,0 +1,90 @@
+"""
+Unit tests for client-side upload preparation
+Run from the frontend directory: python -m pytest test_upload.py
+"""
+
+import io
+
+import numpy as np
+from PIL import Image
+
+from upload import MAX_UPLOAD_SIDE, oriented_size, prepare_upload
+
+
+def _encode(image, fmt, **kwargs):
+    buffer = io.BytesIO()
+    image.save(buffer, format=fmt, **kwargs)
+    return buffer.getvalue()
+
+
+def _decode(data):
+    return np.array(Image.open(io.BytesIO(data)).convert("L"))
+
+
+def _stroke_page(width=2550, height=3300, spacing=7):
+    """White letter-size page with 1 px black vertical strokes"""
+    page = np.full((height, width), 255, dtype=np.uint8)
+    page[:, ::spacing] = 0
+    return page, len(range(0, width, spacing))
+
+
+def _visible_strokes(pixels):
+    """Count runs of columns noticeably darker than the paper"""
+    dark = pixels.mean(axis=0) < 200
+    return int(dark[0]) + int(np.sum(dark[1:] & ~dark[:-1]))
+
+
+def test_small_jpeg_is_sent_unchanged():
+    data = _encode(Image.new("RGB", (800, 600), "white"), "JPEG")
+    assert prepare_upload(data, "doc.jpg", "image/jpeg") == (data, "doc.jpg", "image/jpeg")
+
+
+def test_large_jpeg_is_downscaled():
+    data = _encode(Image.new("RGB", (4000, 3000), "white"), "JPEG")
+    payload, filename, mime = prepare_upload(data, "photo.jpg", "image/jpeg")
+    assert (filename, mime) == ("photo.jpg", "image/jpeg")
+    assert Image.open(io.BytesIO(payload)).size == (MAX_UPLOAD_SIDE, 1920)
+
+
+def test_bilevel_tiff_keeps_thin_strokes():
+    page, strokes = _stroke_page()
+    data = _encode(Image.fromarray(page).convert("1"), "TIFF", compression="group4")
+
+    payload, filename, mime = prepare_upload(data, "scan.tiff", "image/tiff")
+
+    assert (filename, mime) == ("scan.png", "image/png")
+    pixels = _decode(payload)
+    assert max(pixels.shape) == MAX_UPLOAD_SIDE
+    assert _visible_strokes(pixels) == strokes
+
+
+def test_palette_png_keeps_thin_strokes():
+    page, strokes = _stroke_page()
+    data = _encode(Image.fromarray(page).convert("P"), "PNG")
+
+    payload, _, _ = prepare_upload(data, "scan.png", "image/png")
+
+    assert _visible_strokes(_decode(payload)) == strokes
+
+
+def test_16bit_tiff_matches_backend_decoding():
+    pixels = np.full((100, 200), 40000, dtype=np.uint16)
+    pixels[:, 100:] = 5000
+    data = _encode(Image.fromarray(pixels), "TIFF")
+
+    payload, _, mime = prepare_upload(data, "scan.tiff", "image/tiff")
+
+    assert mime == "image/png"
+    # cv2.imdecode(..., IMREAD_COLOR) keeps the high byte: 40000 -> 156, 5000 -> 19
+    assert sorted(np.unique(_decode(payload))) == [19, 156]
+
+
+def test_oriented_size_follows_exif_rotation():
+    image = Image.new("RGB", (400, 300))
+    exif = image.getexif()
+    exif[0x0112] = 6  # Rotated 90 degrees
+    rotated = Image.open(io.BytesIO(_encode(image, "JPEG", exif=exif)))
+    upright = Image.open(io.BytesIO(_encode(image, "JPEG")))
+
+    assert oriented_size(rotated) == (300, 400)
+    assert oriented_size(upright) == (400, 300)
@@ -0,0 +1,76 @@
+"""
+Client-side image preparation for the OCR backend
+"""
+
+import io
+
+from PIL import Image, ImageOps
+
+# Longest side sent to the backend. EasyOCR caps its detection canvas at
+# 2560 px, but recognition crops and the layout analyzer's fixed pixel kernels
+# work on the full image, so this trades some accuracy on very large scans for
+# fewer upload bytes and faster server-side denoising.
+MAX_UPLOAD_SIDE = 2560
+
+# Modes that convert to RGB without losing information
+SAFE_MODES = ("1", "L", "LA", "P", "RGB", "RGBA", "CMYK", "YCbCr")
+
+# EXIF orientations that swap width and height
+TRANSPOSED_ORIENTATIONS = (5, 6, 7, 8)
+
+
+def oriented_size(image: Image.Image):
+    """Image size after EXIF rotation, as the backend's decoder sees it"""
+    width, height = image.size
+    if image.getexif().get(0x0112) in TRANSPOSED_ORIENTATIONS:
+        return height, width
+    return width, height
+
+
+def to_8bit(image: Image.Image) -> Image.Image:
+    """Rescale 16-bit, 32-bit and float images to 8-bit grayscale"""
+    if image.mode.startswith("I;16"):
+        # Same as the backend's cv2.imdecode: keep the high byte
+        return image.convert("I").point(lambda v: v / 256).convert("L")
+
+    low, high = image.getextrema()
+    scale = 255 / (high - low) if high > low else 0
+    return image.point(lambda v: (v - low) * scale).convert("L")
+
+
+def prepare_upload(data: bytes, filename: str, mime: str):
+    """Downscale oversized images and re-encode lossless formats as PNG"""
+    image = Image.open(io.BytesIO(data))
+    image_format = image.format
+
+    # Small JPEG/PNG files are sent untouched
+    if max(image.size) <= MAX_UPLOAD_SIDE and image_format in ("JPEG", "PNG"):
+        return data, filename, mime
+
+    if image.mode.startswith("I") or image.mode == "F":
+        image = to_8bit(image)
+    elif image.mode not in SAFE_MODES:
+        # Let the backend decode anything we can't re-encode faithfully
+        return data, filename, mime
+
+    # The backend decoder honours EXIF orientation, which is lost on re-encode
+    image = ImageOps.exif_transpose(image)
+    if max(image.size) > MAX_UPLOAD_SIDE:
+        # Pillow resizes bilevel and palette images with nearest-neighbour
+        # whatever filter is asked for, which drops thin strokes
+        if image.mode == "1":
+            image = image.convert("L")
+        elif image.mode == "P":
+            image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+        image.thumbnail((MAX_UPLOAD_SIDE, MAX_UPLOAD_SIDE), Image.LANCZOS)
+
+    buffer = io.BytesIO()
+    stem = filename.rsplit(".", 1)[0]
+    if image_format == "JPEG":
+        image.convert("RGB").save(buffer, format="JPEG", quality=90)
+        return buffer.getvalue(), f"{stem}.jpg", "image/jpeg"
+
+    if image.mode not in ("L", "RGB", "RGBA"):
+        image = image.convert("RGB")
+    image.save(buffer, format="PNG")
+    return buffer.getvalue(), f"{stem}.png", "image/png"